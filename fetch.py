@@ -1,8 +1,10 @@
+import ijson
 import requests
 import sys
 
 FLARESOLVERR_URL = "http://localhost:8191/v1"
 TARGET_URL = "https://www.tbsnews.net/latest"
+HTML_FILE = "opinion.html"
 
 payload = {
     "cmd": "request.get",
@@ -10,20 +12,53 @@ payload = {
     "maxTimeout": 60000
 }
 
-r = requests.post(FLARESOLVERR_URL, json=payload)
-data = r.json()
+def read_value(event, value, events):
+    # Rebuild the JSON value that starts at (event, value) from the rest of
+    # the event stream, so an error object is reported in full
+    if event not in ("start_map", "start_array"):
+        return value
 
-# If FlareSolverr returns an error field, expose it
-if "error" in data:
-    print("FlareSolverr error:", data["error"])
-    sys.exit(1)
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ("start_map", "start_array"):
+            depth += 1
+        elif event in ("end_map", "end_array"):
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
 
-# If FlareSolverr fails silently
-if "solution" not in data or "response" not in data["solution"]:
-    print("Invalid FlareSolverr response:", data)
-    sys.exit(1)
+def fetch_html():
+    with requests.post(FLARESOLVERR_URL, json=payload, stream=True) as r:
+        r.raw.decode_content = True
 
-html = data["solution"]["response"]
+        # Walk the JSON stream instead of loading the whole reply into a
+        # dict; only solution.response is kept
+        status = {}
+        events = ijson.parse(r.raw)
+        for prefix, event, value in events:
+            # If FlareSolverr returns an error field, expose it
+            if prefix == "error":
+                raise RuntimeError(f"FlareSolverr error: {read_value(event, value, events)}")
 
-with open("opinion.html", "w", encoding="utf-8") as f:
-    f.write(html)
+            if prefix in ("status", "message"):
+                status[prefix] = value
+
+            if prefix == "solution.response" and event == "string":
+                return value
+
+    # If FlareSolverr fails silently
+    raise RuntimeError(f"Invalid FlareSolverr response: {status}")
+
+if __name__ == "__main__":
+    try:
+        html = fetch_html()
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    with open(HTML_FILE, "w", encoding="utf-8") as f:
+        f.write(html)
@@ -1,12 +1,25 @@
 import sys
 import os
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from selectolax.lexbor import LexborHTMLParser
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from datetime import datetime, timezone, timedelta
-from email.utils import parsedate_to_datetime
-import json
-import re
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from rss_utils import (
+    PUBDATE_FORMAT,
+    channel_items,
+    insert_items,
+    load_channel,
+    load_existing,
+    load_last_seen,
+    parse_date_from_text,
+    save_last_seen,
+    trim_items,
+    url_hash,
+    write_rss,
+    write_tree,
+)
 
 HTML_FILE = "opinion.html"
 XML_FILE = "articles.xml"
@@ -18,298 +31,180 @@ MAX_ITEMS_PER_DAILY = 100
 BD_OFFSET = 6
 
 # -----------------------------
-# UTILITIES
+# SITE
 # -----------------------------
-def parse_relative_time(time_text):
-    now = datetime.now(timezone.utc)
-    time_text = time_text.strip().lower()
-
-    match = re.match(r'(\d+)\s*(m|h|d)', time_text)
-    if match:
-        value = int(match.group(1))
-        unit = match.group(2)
-        if unit == 'm':
-            return now - timedelta(minutes=value)
-        elif unit == 'h':
-            return now - timedelta(hours=value)
-        elif unit == 'd':
-            return now - timedelta(days=value)
-    return now
-
-def parse_date_from_text(date_text):
-    if not date_text:
-        return datetime.now(timezone.utc)
-
-    if re.match(r'\d+\s*[mhd]', date_text.strip().lower()):
-        return parse_relative_time(date_text)
-
-    try:
-        dt = parsedate_to_datetime(date_text)
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
-    except Exception:
-        pass
-
-    formats = [
-        "%b %d, %Y %I:%M %p",
-        "%d %b %Y %H:%M:%S",
-        "%Y-%m-%d %H:%M:%S",
-    ]
-
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_text, fmt)
-            return dt.replace(tzinfo=timezone.utc)
-        except Exception:
-            continue
-
-    return datetime.now(timezone.utc)
-
-def load_existing(file_path):
-    if not os.path.exists(file_path):
-        return []
-    try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-    except Exception:
-        return []
-
-    items = []
-    for item in root.findall(".//item"):
-        try:
-            title_node = item.find("title")
-            link_node = item.find("link")
-            desc_node = item.find("description")
-            pub_node = item.find("pubDate")
-
-            title = (title_node.text or "").strip() if title_node is not None else ""
-            link = (link_node.text or "").strip() if link_node is not None else ""
-            desc = desc_node.text or "" if desc_node is not None else ""
-
-            if pub_node is not None and pub_node.text:
-                dt = parse_date_from_text(pub_node.text)
-            else:
-                dt = datetime.now(timezone.utc)
-
-            items.append({
-                "title": title,
-                "link": link,
-                "description": desc,
-                "pubDate": dt,
-                "img": item.find("enclosure").get("url", "") if item.find("enclosure") is not None else ""
-            })
-        except Exception:
-            continue
-    return items
-
-def write_rss(items, file_path, title="Feed"):
-    rss = ET.Element("rss", version="2.0")
-    channel = ET.SubElement(rss, "channel")
-    ET.SubElement(channel, "title").text = title
-    ET.SubElement(channel, "link").text = "https://www.tbsnews.net"
-    ET.SubElement(channel, "description").text = f"{title} - The Business Standard News"
-
-    for item in items:
-        it = ET.SubElement(channel, "item")
-        ET.SubElement(it, "title").text = item.get("title", "")
-        ET.SubElement(it, "link").text = item.get("link", "")
-        ET.SubElement(it, "description").text = item.get("description", "")
-
-        pub = item.get("pubDate")
-        if isinstance(pub, datetime):
-            ET.SubElement(it, "pubDate").text = pub.strftime("%a, %d %b %Y %H:%M:%S %z")
-        else:
-            ET.SubElement(it, "pubDate").text = str(pub)
-
-        if item.get("img"):
-            ET.SubElement(it, "enclosure", url=item["img"], type="image/jpeg")
-
-    xml_str = minidom.parseString(ET.tostring(rss)).toprettyxml(indent="  ")
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(xml_str)
-
-# -----------------------------
-# LAST SEEN TRACKING (FIXED)
-# -----------------------------
-def load_last_seen():
-    if not os.path.exists(LAST_SEEN_FILE):
-        return {"last_seen": None, "seen_links": set()}
-
-    try:
-        with open(LAST_SEEN_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            last_seen_str = data.get("last_seen")
-            last_dt = datetime.fromisoformat(last_seen_str) if last_seen_str else None
-            seen_links = set(data.get("seen_links", []))
-            return {"last_seen": last_dt, "seen_links": seen_links}
-    except Exception:
-        return {"last_seen": None, "seen_links": set()}
-
-def save_last_seen(last_dt, seen_links):
-    with open(LAST_SEEN_FILE, "w", encoding="utf-8") as f:
-        json.dump({
-            "last_seen": last_dt.isoformat() if last_dt else None,
-            "seen_links": list(seen_links),
-            "last_run": datetime.now(timezone.utc).isoformat()
-        }, f, indent=2)
+SITE_URL = "https://www.tbsnews.net"
+SITE_NAME = "The Business Standard News"
+SITE_DESCRIPTION = "Latest news articles from The Business Standard Bangladesh"
+DAILY_TITLE = "Daily Feed - The Business Standard"
 
 # -----------------------------
 # SCRAPE HTML
 # -----------------------------
-def scrape_articles():
-    if not os.path.exists(HTML_FILE):
-        print(f"HTML file '{HTML_FILE}' not found")
-        return []
-
-    with open(HTML_FILE, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
+class Article(NamedTuple):
+    url: str
+    title: str
+    desc: str
+    pub: datetime
+    img: str
+
+def card_fields(card):
+    # One walk over the card's subtree picks up the title link, date and
+    # image together instead of running a separate selector for each
+    link_tag = date_tag = img_tag = None
+    for node in card.traverse():
+        tag = node.tag
+        if tag == "h3" and link_tag is None:
+            if "card-title" in (node.attributes.get("class") or "").split():
+                link_tag = node.css_first("a")
+        elif tag == "div" and date_tag is None:
+            if "date" in (node.attributes.get("class") or "").split():
+                date_tag = node
+        elif tag == "img" and img_tag is None:
+            img_tag = node
+    return link_tag, date_tag, img_tag
+
+def scrape_articles(existing=(), html=None):
+    # existing holds url_hash() keys already in the feed; those cards are
+    # dropped before any of their fields are extracted. html, when given,
+    # is parsed directly instead of reading HTML_FILE.
+    if html is None:
+        if not os.path.exists(HTML_FILE):
+            print(f"HTML file '{HTML_FILE}' not found")
+            return []
+
+        with open(HTML_FILE, "r", encoding="utf-8") as f:
+            html = f.read()
+
+    tree = LexborHTMLParser(html)
 
     articles = []
-    base_url = "https://www.tbsnews.net"
+    # URLs already extracted; a story shown in several page sections
+    # is only extracted the first time it is seen
+    seen = set()
+    base_url = SITE_URL
 
-    for card in soup.select("div.card"):
-        link_tag = card.select_one("h3.card-title a")
+    for card in tree.css("div.card"):
+        link_tag, date_tag, img_tag = card_fields(card)
         if not link_tag:
             continue
 
-        url = link_tag.get("href", "")
+        url = link_tag.attributes.get("href", "")
         if not url:
             continue
 
         if url.startswith("/"):
             url = base_url + url
 
-        if "/videos/" in url:
+        if "/videos/" in url or url in seen:
+            continue
+
+        if url_hash(url) in existing:
             continue
 
-        title = link_tag.get_text(strip=True)
+        title = link_tag.text(strip=True)
         if not title:
             continue
 
         desc = ""
 
-        date_tag = card.select_one("div.date")
-        pub_text = date_tag.get_text(strip=True) if date_tag else ""
+        pub_text = date_tag.text(strip=True) if date_tag else ""
         pub_date = parse_date_from_text(pub_text)
 
         img = ""
-        img_tag = card.select_one("img")
         if img_tag:
-            img = img_tag.get("data-src", "") or img_tag.get("src", "")
+            img = img_tag.attributes.get("data-src") or img_tag.attributes.get("src") or ""
             if img.startswith("/"):
                 img = base_url + img
 
-        articles.append({
-            "url": url,
-            "title": title,
-            "desc": desc,
-            "pub": pub_date,
-            "img": img
-        })
+        seen.add(url)
+        articles.append(Article(url, title, desc, pub_date, img))
 
-    print(f"Found {len(articles)} articles in HTML (excluding videos)")
+    print(f"Found {len(articles)} new articles in HTML (excluding videos)")
     return articles
 
 # -----------------------------
 # MAIN XML UPDATE (unchanged)
 # -----------------------------
-def update_main_xml():
+def load_main_channel():
+    return load_channel(XML_FILE, SITE_NAME, SITE_URL, SITE_DESCRIPTION)
+
+def update_main_xml(fetch=False):
+    # Returns the updated channel so a full run can build the daily feed
+    # from memory instead of re-reading articles.xml
     print("[Updating articles.xml]")
 
-    articles = scrape_articles()
-    if not articles:
-        print("No articles found in HTML")
-        return
-
-    if os.path.exists(XML_FILE):
-        try:
-            tree = ET.parse(XML_FILE)
-            root = tree.getroot()
-        except ET.ParseError:
-            root = ET.Element("rss", version="2.0")
+    html = None
+    if fetch:
+        # Imported here so runs without --fetch skip loading the HTTP stack
+        from fetch import fetch_html
+
+        # Load articles.xml on a worker thread while the main thread waits
+        # on FlareSolverr, then parse the fetched page without touching disk
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(load_main_channel)
+            try:
+                html = fetch_html()
+            except RuntimeError as e:
+                print(e)
+                sys.exit(1)
+            root, channel, existing = pending.result()
     else:
-        root = ET.Element("rss", version="2.0")
-
-    channel = root.find("channel")
-    if channel is None:
-        channel = ET.SubElement(root, "channel")
-        ET.SubElement(channel, "title").text = "The Business Standard News"
-        ET.SubElement(channel, "link").text = "https://www.tbsnews.net"
-        ET.SubElement(channel, "description").text = "Latest news articles from The Business Standard Bangladesh"
+        root, channel, existing = load_main_channel()
 
-    existing = set()
-    for item in channel.findall("item"):
-        link_tag = item.find("link")
-        if link_tag is not None:
-            existing.add(link_tag.text.strip())
+    articles = scrape_articles(existing, html)
+    if not articles:
+        print("No new articles found in HTML")
+        return channel
 
     new_items = []
     for art in articles:
-        if art["url"] in existing:
-            continue
-
         item = ET.Element("item")
-        ET.SubElement(item, "title").text = art["title"]
-        ET.SubElement(item, "link").text = art["url"]
-        ET.SubElement(item, "description").text = art["desc"]
-        ET.SubElement(item, "pubDate").text = art["pub"].strftime("%a, %d %b %Y %H:%M:%S %z")
+        ET.SubElement(item, "title").text = art.title
+        ET.SubElement(item, "link").text = art.url
+        ET.SubElement(item, "description").text = art.desc
+        ET.SubElement(item, "pubDate").text = art.pub.strftime(PUBDATE_FORMAT)
 
-        if art["img"]:
-            ET.SubElement(item, "enclosure", url=art["img"], type="image/jpeg")
+        if art.img:
+            ET.SubElement(item, "enclosure", url=art.img, type="image/jpeg")
 
-        existing.add(art["url"])
         new_items.append(item)
 
-    insert_position = 0
-    for child in channel:
-        if child.tag in ["title", "link", "description"]:
-            insert_position += 1
-        else:
-            break
-
-    for i, item in enumerate(new_items):
-        channel.insert(insert_position + i, item)
-
-    all_items = channel.findall("item")
-    if len(all_items) > MAX_ITEMS:
-        for old_item in all_items[MAX_ITEMS:]:
-            channel.remove(old_item)
-
-    tree = ET.ElementTree(root)
-    ET.indent(tree, space="  ", level=0)
-    tree.write(XML_FILE, encoding="utf-8", xml_declaration=True)
+    insert_items(channel, new_items)
+    trim_items(channel, MAX_ITEMS)
+    write_tree(root, XML_FILE)
+    return channel
 
 # -----------------------------
 # DAILY FEED (FIXED LOGIC)
 # -----------------------------
-def update_daily():
+def update_daily(channel=None):
     print("\n[Updating daily feed]")
 
-    last_data = load_last_seen()
+    last_data = load_last_seen(LAST_SEEN_FILE)
     last_seen_dt = last_data["last_seen"]
     seen_links = set(last_data["seen_links"])
 
-    master_items = load_existing(XML_FILE)
+    master_items = channel_items(channel) if channel is not None else load_existing(XML_FILE)
     new_items = []
 
     for item in master_items:
-        link = item["link"]
+        link_key = url_hash(item["link"])
 
-        if link not in seen_links:
+        if link_key not in seen_links:
             new_items.append(item)
-            seen_links.add(link)
+            seen_links.add(link_key)
 
     if not new_items:
         placeholder = [{
             "title": "No new articles since last update",
-            "link": "https://www.tbsnews.net",
+            "link": SITE_URL,
             "description": "Daily feed will populate when new articles are published.",
             "pubDate": datetime.now(timezone.utc),
             "img": ""
         }]
-        write_rss(placeholder, f"{DAILY_FILE_PREFIX}.xml", title="Daily Feed - The Business Standard")
-        save_last_seen(datetime.now(timezone.utc), seen_links)
+        write_rss(placeholder, f"{DAILY_FILE_PREFIX}.xml", DAILY_TITLE, SITE_URL, SITE_NAME)
+        save_last_seen(LAST_SEEN_FILE, datetime.now(timezone.utc), seen_links)
         return [f"{DAILY_FILE_PREFIX}.xml"]
 
     new_items.sort(key=lambda x: x["pubDate"], reverse=True)
@@ -322,16 +217,16 @@ def update_daily():
     for idx, batch in enumerate(batches):
         if idx == 0:
             filename = f"{DAILY_FILE_PREFIX}.xml"
-            title = "Daily Feed - The Business Standard"
+            title = DAILY_TITLE
         else:
             filename = f"{DAILY_FILE_PREFIX}_{idx + 1}.xml"
             title = f"Daily Feed {idx + 1} - The Business Standard"
 
-        write_rss(batch, filename, title=title)
+        write_rss(batch, filename, title, SITE_URL, SITE_NAME)
         created_files.append(filename)
 
     last_dt = max([i["pubDate"] for i in new_items])
-    save_last_seen(last_dt, seen_links)
+    save_last_seen(LAST_SEEN_FILE, last_dt, seen_links)
 
     return created_files
 
@@ -340,6 +235,7 @@ def update_daily():
 # -----------------------------
 if __name__ == "__main__":
     args = sys.argv[1:]
+    fetch = "--fetch" in args
 
     files_created = []
 
@@ -348,12 +244,12 @@ if __name__ == "__main__":
         files_created = daily_files + [LAST_SEEN_FILE]
 
     elif "--main-only" in args:
-        update_main_xml()
+        update_main_xml(fetch)
         files_created = [XML_FILE]
 
     else:
-        update_main_xml()
-        daily_files = update_daily()
+        channel = update_main_xml(fetch)
+        daily_files = update_daily(channel)
         files_created = [XML_FILE] + daily_files + [LAST_SEEN_FILE]
 
     for f in files_created:
@@ -0,0 +1,268 @@
+import os
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone, timedelta
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+import json
+import re
+from xml.sax.saxutils import escape
+
+PUBDATE_FORMAT = "%a, %d %b %Y %H:%M:%S %z"
+RELATIVE_TIME_RE = re.compile(r'(\d+)\s*([mhd])')
+ESCAPE_TEXT_RE = re.compile(r'[&<>]')
+ESCAPE_ATTR_RE = re.compile(r'[&<>"\n\r\t]')
+ATTR_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
+# -----------------------------
+# UTILITIES
+# -----------------------------
+def url_hash(url):
+    # 64-bit FNV-1a; dedup sets hold these ints instead of full URL strings
+    h = 0xcbf29ce484222325
+    for b in url.encode("utf-8"):
+        h = ((h ^ b) * 0x100000001b3) & 0xffffffffffffffff
+    return h
+
+def parse_relative_time(time_text):
+    now = datetime.now(timezone.utc)
+    time_text = time_text.strip().lower()
+
+    match = RELATIVE_TIME_RE.match(time_text)
+    if match:
+        value = int(match.group(1))
+        unit = match.group(2)
+        if unit == 'm':
+            return now - timedelta(minutes=value)
+        elif unit == 'h':
+            return now - timedelta(hours=value)
+        elif unit == 'd':
+            return now - timedelta(days=value)
+    return now
+
+def parse_date_from_text(date_text):
+    if not date_text:
+        return datetime.now(timezone.utc)
+
+    if RELATIVE_TIME_RE.match(date_text.strip().lower()):
+        return parse_relative_time(date_text)
+
+    dt = _parse_date_cached(date_text)
+    if dt is None:
+        return datetime.now(timezone.utc)
+    return dt
+
+@lru_cache(maxsize=4096)
+def _parse_date_cached(date_text):
+    # Absolute dates only; relative times and the "now" fallback depend on
+    # the clock, so they stay out of the cache. None means unparseable.
+    try:
+        dt = parsedate_to_datetime(date_text)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.astimezone(timezone.utc)
+    except Exception:
+        pass
+
+    formats = [
+        "%b %d, %Y %I:%M %p",
+        "%d %b %Y %H:%M:%S",
+        "%Y-%m-%d %H:%M:%S",
+    ]
+
+    for fmt in formats:
+        try:
+            dt = datetime.strptime(date_text, fmt)
+            return dt.replace(tzinfo=timezone.utc)
+        except Exception:
+            continue
+
+    return None
+
+# -----------------------------
+# READ FEEDS
+# -----------------------------
+def load_existing(file_path):
+    # Generator over the feed's items; iterparse plus clear() keeps only the
+    # current item in memory instead of the whole tree
+    if not os.path.exists(file_path):
+        return
+
+    try:
+        for event, item in ET.iterparse(file_path, events=("end",)):
+            if item.tag != "item":
+                continue
+            entry = read_item(item)
+            item.clear()
+            if entry is not None:
+                yield entry
+    except Exception:
+        return
+
+def channel_items(channel):
+    # Same entries as load_existing(), from a channel already in memory
+    for item in channel.iterfind("item"):
+        entry = read_item(item)
+        if entry is not None:
+            yield entry
+
+def read_item(item):
+    try:
+        title_node = item.find("title")
+        link_node = item.find("link")
+        desc_node = item.find("description")
+        pub_node = item.find("pubDate")
+
+        title = (title_node.text or "").strip() if title_node is not None else ""
+        link = (link_node.text or "").strip() if link_node is not None else ""
+        desc = desc_node.text or "" if desc_node is not None else ""
+
+        if pub_node is not None and pub_node.text:
+            dt = parse_date_from_text(pub_node.text)
+        else:
+            dt = datetime.now(timezone.utc)
+
+        return {
+            "title": title,
+            "link": link,
+            "description": desc,
+            "pubDate": dt,
+            "img": item.find("enclosure").get("url", "") if item.find("enclosure") is not None else ""
+        }
+    except Exception:
+        return None
+
+def load_channel(file_path, title, link, description):
+    if os.path.exists(file_path):
+        try:
+            tree = ET.parse(file_path)
+            root = tree.getroot()
+        except ET.ParseError:
+            root = ET.Element("rss", version="2.0")
+    else:
+        root = ET.Element("rss", version="2.0")
+
+    channel = root.find("channel")
+    if channel is None:
+        channel = ET.SubElement(root, "channel")
+        ET.SubElement(channel, "title").text = title
+        ET.SubElement(channel, "link").text = link
+        ET.SubElement(channel, "description").text = description
+
+    existing = {url_hash(link.text.strip()) for link in channel.iterfind("./item/link") if link.text}
+    return root, channel, existing
+
+# -----------------------------
+# UPDATE FEEDS
+# -----------------------------
+def insert_items(channel, new_items):
+    insert_position = 0
+    for child in channel:
+        if child.tag in ["title", "link", "description"]:
+            insert_position += 1
+        else:
+            break
+
+    channel[insert_position:insert_position] = new_items
+
+def trim_items(channel, max_items):
+    # Rebuild the children once rather than remove() each overflow item,
+    # which rescans the channel every time
+    item_count = 0
+    kept = []
+    for child in channel:
+        if child.tag == "item":
+            item_count += 1
+            if item_count > max_items:
+                continue
+        kept.append(child)
+    if item_count > max_items:
+        channel[:] = kept
+
+def write_tree(root, file_path):
+    tree = ET.ElementTree(root)
+    ET.indent(tree, space="  ", level=0)
+    with open(file_path, "wb", buffering=1 << 20) as f:
+        tree.write(f, encoding="utf-8", xml_declaration=True)
+
+# -----------------------------
+# WRITE FEEDS
+# -----------------------------
+def xml_text(text):
+    # Most titles and links contain nothing to escape; skip the replace
+    # passes for those
+    if not ESCAPE_TEXT_RE.search(text):
+        return text
+    return escape(text)
+
+def xml_attr(value):
+    if not ESCAPE_ATTR_RE.search(value):
+        return value
+    return escape(value, ATTR_ENTITIES)
+
+def xml_element(indent, tag, text):
+    if not text:
+        return f"{indent}<{tag} />"
+    return f"{indent}<{tag}>{xml_text(text)}</{tag}>"
+
+def write_rss(items, file_path, title, link, site_name):
+    # The daily feeds have a fixed shape, so they are serialized directly
+    # rather than built as an ElementTree; output matches ET.indent + write
+    lines = [
+        "<?xml version='1.0' encoding='utf-8'?>",
+        '<rss version="2.0">',
+        "  <channel>",
+        xml_element("    ", "title", title),
+        xml_element("    ", "link", link),
+        xml_element("    ", "description", f"{title} - {site_name}"),
+    ]
+
+    for item in items:
+        lines.append("    <item>")
+        lines.append(xml_element("      ", "title", item.get("title", "")))
+        lines.append(xml_element("      ", "link", item.get("link", "")))
+        lines.append(xml_element("      ", "description", item.get("description", "")))
+
+        pub = item.get("pubDate")
+        if isinstance(pub, datetime):
+            lines.append(xml_element("      ", "pubDate", pub.strftime(PUBDATE_FORMAT)))
+        else:
+            lines.append(xml_element("      ", "pubDate", str(pub)))
+
+        if item.get("img"):
+            lines.append(f'      <enclosure url="{xml_attr(item["img"])}" type="image/jpeg" />')
+        lines.append("    </item>")
+
+    lines.append("  </channel>")
+    lines.append("</rss>")
+
+    with open(file_path, "wb", buffering=1 << 20) as f:
+        f.write("\n".join(lines).encode("utf-8"))
+
+# -----------------------------
+# LAST SEEN TRACKING (FIXED)
+# -----------------------------
+def load_last_seen(file_path):
+    if not os.path.exists(file_path):
+        return {"last_seen": None, "seen_links": set()}
+
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+            last_seen_str = data.get("last_seen")
+            last_dt = datetime.fromisoformat(last_seen_str) if last_seen_str else None
+            # Older files stored full URLs; hash them on the way in
+            seen_links = {
+                url_hash(link) if isinstance(link, str) else link
+                for link in data.get("seen_links", [])
+            }
+            return {"last_seen": last_dt, "seen_links": seen_links}
+    except Exception:
+        return {"last_seen": None, "seen_links": set()}
+
+def save_last_seen(file_path, last_dt, seen_links):
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "last_seen": last_dt.isoformat() if last_dt else None,
+            "seen_links": list(seen_links),
+            "last_run": datetime.now(timezone.utc).isoformat()
+        }, f, indent=2)